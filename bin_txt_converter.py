@@ -1,52 +1,69 @@
 import argparse
+import os
+import shutil
 import sys
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, fall back to the pure-Python loops
+    np = None
+
+# MSB-first bits of every byte value, used when numpy is unavailable
+_BYTE_BITS = tuple(tuple((i >> s) & 1 for s in range(7, -1, -1)) for i in range(256))
+_GATHER_MAGIC = 0x0102040810204080
+
+# Stream files in fixed-size chunks instead of reading them whole
+_CHUNK_SIZE = 1 << 20
+
 def text_to_bits(text):
     """Convert text to a list of bits (0s and 1s)."""
+    if np is not None:
+        return np.unpackbits(np.frombuffer(text.encode('utf-8'), dtype=np.uint8)).tolist()
     bits = []
     for byte in text.encode('utf-8'):
-        for i in range(7, -1, -1):  # MSB first
-            bits.append((byte >> i) & 1)
+        bits.extend(_BYTE_BITS[byte])
     return bits
 
 def bits_to_text(bits):
     """Convert a list of bits to text."""
     if len(bits) % 8 != 0:
         raise ValueError("Bit list length must be a multiple of 8")
-    bytes_list = []
-    for i in range(0, len(bits), 8):
-        byte = 0
-        for j in range(8):
-            byte = (byte << 1) | bits[i + j]
-        bytes_list.append(byte)
+    if np is not None:
+        return np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes().decode('utf-8')
+    # One bit per byte, read as a big-endian u64; the multiply gathers the
+    # eight low bits into the top byte (MSB first)
+    data = bytes(bits)
+    bytes_list = [
+        (int.from_bytes(data[i:i + 8], 'big') * _GATHER_MAGIC >> 56) & 0xFF
+        for i in range(0, len(data), 8)
+    ]
     return bytes(bytes_list).decode('utf-8')
 
+def _copy_text(input_file, output_file, in_newline, out_newline):
+    """Stream text from input_file to output_file, replacing output only on success."""
+    # Write next to the target and rename at the end, so invalid UTF-8 in
+    # the input leaves no empty or truncated output behind
+    part_file = output_file + '.part'
+    try:
+        with open(input_file, 'r', encoding='utf-8', newline=in_newline, buffering=_CHUNK_SIZE) as fi, \
+                open(part_file, 'w', encoding='utf-8', newline=out_newline, buffering=_CHUNK_SIZE) as fo:
+            shutil.copyfileobj(fi, fo, _CHUNK_SIZE)
+        os.replace(part_file, output_file)
+    except BaseException:
+        if os.path.exists(part_file):
+            os.remove(part_file)
+        raise
+
 def encode(input_file, output_file):
     """Encode text file to binary file."""
-    with open(input_file, 'r', encoding='utf-8') as f:
-        text = f.read()
-    bits = text_to_bits(text)
-    # Pack bits into bytes
-    byte_data = bytearray()
-    for i in range(0, len(bits), 8):
-        byte = 0
-        for j in range(min(8, len(bits) - i)):
-            byte = (byte << 1) | bits[i + j]
-        byte_data.append(byte)
-    with open(output_file, 'wb') as f:
-        f.write(byte_data)
+    # Unpacking to MSB-first bits and packing them back is the identity, so
+    # the binary file is just the UTF-8 encoding of the text.
+    _copy_text(input_file, output_file, in_newline=None, out_newline='')
 
 def decode(input_file, output_file):
     """Decode binary file to text file."""
-    with open(input_file, 'rb') as f:
-        byte_data = f.read()
-    bits = []
-    for byte in byte_data:
-        for i in range(7, -1, -1):  # MSB first
-            bits.append((byte >> i) & 1)
-    text = bits_to_text(bits)
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(text)
+    # Same as encode: decoding with utf-8 still validates the input
+    _copy_text(input_file, output_file, in_newline='', out_newline=None)
 
 def main():
     parser = argparse.ArgumentParser(description="Encode TXT to BIN or decode BIN to TXT")
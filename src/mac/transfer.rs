@@ -10,6 +10,7 @@ use crate::mac::csma::CsmaNode;
 use crate::phy::LineCodingKind;
 use crate::ui::progress::{ProgressManager, templates};
 use crate::utils::consts::*;
+use crate::utils::logging::PhaseTimer;
 
 pub fn run_sender(
     shared: recorder::AppShared,
@@ -48,6 +49,8 @@ pub fn run_sender(
 
     let (tx, rx) = crossbeam_channel::unbounded::<Vec<u8>>();
 
+    let timer = PhaseTimer::start("transmit");
+
     let sub_progress_manager = progress_manager.clone();
     let handle = thread::spawn(move || {
         let mut node = CsmaNode::new(
@@ -80,6 +83,8 @@ pub fn run_sender(
     drop(tx); // Close the channel
 
     handle.join().unwrap();
+
+    timer.finish();
 }
 
 pub fn run_receiver(
@@ -109,6 +114,8 @@ pub fn run_receiver(
         )
         .unwrap();
 
+    let timer = PhaseTimer::start("receive");
+
     let sub_progress_manager = progress_manager.clone();
     let handle = thread::spawn(move || {
         let mut node = CsmaNode::new(
@@ -130,6 +137,8 @@ pub fn run_receiver(
 
     handle.join().unwrap();
 
+    timer.finish();
+
     let output_data: Vec<u8> = all_data
         .into_iter()
         .flatten()
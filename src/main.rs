@@ -20,7 +20,7 @@ use phy::{Frame, LineCodingKind, PhyDecoder, PhyEncoder};
 use ui::print_banner;
 use ui::progress::ProgressManager;
 use utils::consts::*;
-use utils::logging::init_logging;
+use utils::logging::{init_logging, log_ready};
 
 #[derive(Parser)]
 #[command(name = "trackmaker-rs")]
@@ -393,6 +393,8 @@ fn main() {
             .clear();
     }
 
+    log_ready();
+
     if selection == 0 {
         // Sender
         run_sender(
@@ -16,6 +16,11 @@ pub const OUTPUT_PORT_NAME: &str = "tm_out";
 /// 进度更新间隔（毫秒）
 pub const PROGRESS_UPDATE_INTERVAL_MS: u64 = 50;
 
+// Parameters swept by tools/test.py (SAMPLES_PER_LEVEL, PREAMBLE_PATTERN_BYTES,
+// MAX_FRAME_DATA_SIZE, DIFS_DURATION_MS, CW_MIN, CW_MAX, SLOT_TIME_MS) live in
+// their own file so the script only ever rewrites that file.
+include!("consts_sweep.rs");
+
 // ============================================================================
 // Physical Layer Parameters (Project 2)
 // ============================================================================
@@ -26,16 +31,7 @@ pub const SAMPLE_RATE: u32 = 48000;
 /// Target bit rate (bps) - Project 2 requires >= 12 Kbps
 pub const BIT_RATE: u32 = 12000;
 
-/// Samples per level (Manchester level or 4B5B bit)
-pub const SAMPLES_PER_LEVEL: usize = 3;
-
 // Frame Parameters
-/// Number of 0xAA pattern bytes in preamble
-pub const PREAMBLE_PATTERN_BYTES: usize = 2;
-
-/// Maximum data payload per frame (bytes)
-pub const MAX_FRAME_DATA_SIZE: usize = 128;
-
 /// Milliseconds between frames
 pub const INTER_FRAME_GAP_MS: u32 = 1;
 
@@ -52,15 +48,6 @@ pub const PHY_HEADER_BYTES: usize = 7; // Length (2) + CRC (1) + Frame Type (1)
 pub const ENERGY_THRESHOLD: f32 = 0.5;
 /// Energy detection minimum samples
 pub const ENERGY_DETECTION_SAMPLES: usize = 20;
-/// Distributed Inter-frame Space (DIFS) in milliseconds.
-/// The duration to sense the channel to see if it's idle.
-pub const DIFS_DURATION_MS: u64 = 20;
-/// Minimum contention window size (in slots).
-pub const CW_MIN: u32 = 1;
-/// Maximum contention window size (in slots).
-pub const CW_MAX: u32 = 100;
-/// Duration of a single backoff slot in milliseconds.
-pub const SLOT_TIME_MS: u64 = 5;
 
 // --- Ip Constants ---
 pub const IP_TTL: u8 = 64;
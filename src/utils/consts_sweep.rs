@@ -0,0 +1,23 @@
+// Parameters swept by tools/test.py, included from consts.rs.
+
+// --- Physical Layer ---
+/// Samples per level (Manchester level or 4B5B bit)
+pub const SAMPLES_PER_LEVEL: usize = 3;
+
+// --- Frame ---
+/// Number of 0xAA pattern bytes in preamble
+pub const PREAMBLE_PATTERN_BYTES: usize = 2;
+
+/// Maximum data payload per frame (bytes)
+pub const MAX_FRAME_DATA_SIZE: usize = 128;
+
+// --- CSMA/CA ---
+/// Distributed Inter-frame Space (DIFS) in milliseconds.
+/// The duration to sense the channel to see if it's idle.
+pub const DIFS_DURATION_MS: u64 = 20;
+/// Minimum contention window size (in slots).
+pub const CW_MIN: u32 = 1;
+/// Maximum contention window size (in slots).
+pub const CW_MAX: u32 = 100;
+/// Duration of a single backoff slot in milliseconds.
+pub const SLOT_TIME_MS: u64 = 5;
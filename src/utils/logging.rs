@@ -1,3 +1,4 @@
+use std::time::Instant;
 use tracing_subscriber::{EnvFilter, fmt};
 
 pub fn init_logging() {
@@ -13,3 +14,46 @@ pub fn init_logging() {
         .with_writer(std::io::stdout)
         .init();
 }
+
+/// Environment variable set by tools/test.py to enable the markers below
+const MARKERS_ENV: &str = "TRACKMAKER_MARKERS";
+
+/// Whether tools/test.py asked for machine-readable markers on stdout
+fn markers_enabled() -> bool {
+    std::env::var_os(MARKERS_ENV).is_some()
+}
+
+/// Measures one phase with a monotonic clock and prints a timing marker
+/// (parsed by tools/test.py) when finished
+pub struct PhaseTimer {
+    phase: &'static str,
+    start: Instant,
+}
+
+impl PhaseTimer {
+    pub fn start(phase: &'static str) -> Self {
+        Self {
+            phase,
+            start: Instant::now(),
+        }
+    }
+
+    pub fn finish(self) {
+        if markers_enabled() {
+            println!(
+                "TIMING: phase={} elapsed_ns={}",
+                self.phase,
+                self.start
+                    .elapsed()
+                    .as_nanos()
+            );
+        }
+    }
+}
+
+/// Print the readiness sentinel once the node is up (waited on by tools/test.py)
+pub fn log_ready() {
+    if markers_enabled() {
+        println!("READY");
+    }
+}
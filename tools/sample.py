@@ -9,20 +9,26 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-from scipy import signal
+from scipy import fft, signal
 import os
 
+try:
+    import orjson
+except ImportError:  # orjson 可选，缺失时退回标准库 json
+    orjson = None
+
 def load_audio_data(json_file_path):
     """从JSON文件加载音频数据"""
     try:
-        with open(json_file_path, 'r') as f:
-            data = json.load(f)
+        with open(json_file_path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         print(f"成功加载JSON文件: {json_file_path}")
         return data
     except FileNotFoundError:
         print(f"文件未找到: {json_file_path}")
         return None
-    except json.JSONDecodeError:
+    except ValueError:  # json 与 orjson 的解析错误均继承自 ValueError
         print(f"JSON解析错误: {json_file_path}")
         return None
 
@@ -48,14 +54,78 @@ def create_sample_data():
         'channels': 1
     }
 
+def compute_spectrum(audio_data, sample_rate):
+    """计算单边频谱（实信号只需 rfft）"""
+    spectrum = fft.rfft(audio_data, workers=-1)
+    freqs = fft.rfftfreq(len(audio_data), 1/sample_rate)
+    # 原地转换为dB，避免额外的临时数组
+    magnitude_db = np.abs(spectrum)
+    magnitude_db += 1e-10
+    np.log10(magnitude_db, out=magnitude_db)
+    magnitude_db *= 20
+    return freqs, magnitude_db
+
+def compute_spectrogram(audio_data, sample_rate, nperseg=1024, noverlap=512):
+    """计算短时傅里叶变换，返回 (频率, 时间, dB)"""
+    frequencies, times, Sxx = signal.spectrogram(
+        audio_data,
+        sample_rate,
+        nperseg=nperseg,
+        noverlap=noverlap
+    )
+    return frequencies, times, 10 * np.log10(Sxx + 1e-10)
+
+def compute_stats(audio_data, block_size=1 << 16):
+    """计算 (最大值, 最小值, 均值, 标准差, RMS)
+
+    共两遍遍历：先求均值，再按块（块可放入缓存）同时求最大/最小值和去均值后的平方和，
+    不分配与信号等长的临时数组。RMS 由 std² + mean² 得到。
+    """
+    audio_data = np.asarray(audio_data, dtype=np.float64)
+    n = len(audio_data)
+    mean = audio_data.mean()
+    max_val, min_val, sq_sum = -np.inf, np.inf, 0.0
+    for start in range(0, n, block_size):
+        block = audio_data[start:start + block_size]
+        max_val = max(max_val, block.max())
+        min_val = min(min_val, block.min())
+        # 先减去均值再平方（两遍法），有直流偏置时避免 E[x²] - mean² 的相消误差
+        centered = block - mean
+        sq_sum += np.dot(centered, centered)
+    std = np.sqrt(sq_sum / n)
+    rms = np.sqrt(std * std + mean * mean)
+    return max_val, min_val, mean, std, rms
+
+def waveform_envelope(audio_data, sample_rate, n_buckets=5000):
+    """按 min/max 抽取波形，返回 (时间, 振幅)，点数不超过 2 * n_buckets"""
+    n = len(audio_data)
+    if n <= 2 * n_buckets:
+        return np.linspace(0, n / sample_rate, n), audio_data
+    
+    bucket_size = -(-n // n_buckets)  # 向上取整
+    n_full = n // bucket_size * bucket_size
+    buckets = np.asarray(audio_data[:n_full]).reshape(-1, bucket_size)
+    lo = buckets.min(axis=1)
+    hi = buckets.max(axis=1)
+    if n_full < n:  # 最后一个不满的桶
+        tail = audio_data[n_full:]
+        lo = np.append(lo, np.min(tail))
+        hi = np.append(hi, np.max(tail))
+    
+    # 每个桶输出 lo/hi 两个点，交错排列成包络线
+    starts = np.arange(len(lo)) * bucket_size / sample_rate
+    time = np.repeat(starts, 2)
+    values = np.column_stack((lo, hi)).ravel()
+    return time, values
+
 def plot_waveform(audio_data, sample_rate):
     """绘制音频波形图"""
-    time = np.linspace(0, len(audio_data) / sample_rate, len(audio_data))
+    time, values = waveform_envelope(audio_data, sample_rate)
     
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=time,
-        y=audio_data,
+        y=values,
         mode='lines',
         name='音频波形',
         line=dict(color='blue', width=1)
@@ -71,20 +141,16 @@ def plot_waveform(audio_data, sample_rate):
     
     return fig
 
-def plot_spectrum(audio_data, sample_rate):
+def plot_spectrum(audio_data, sample_rate, spectrum=None):
     """绘制频谱图"""
-    # 计算FFT
-    fft = np.fft.fft(audio_data)
-    freqs = np.fft.fftfreq(len(audio_data), 1/sample_rate)
-    
-    # 只取正频率部分
-    positive_freqs = freqs[:len(freqs)//2]
-    magnitude = np.abs(fft[:len(fft)//2])
+    if spectrum is None:
+        spectrum = compute_spectrum(audio_data, sample_rate)
+    freqs, magnitude_db = spectrum
     
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=positive_freqs,
-        y=20 * np.log10(magnitude + 1e-10),  # 转换为dB
+    fig.add_trace(go.Scattergl(
+        x=freqs,
+        y=magnitude_db,
         mode='lines',
         name='频谱',
         line=dict(color='red', width=1)
@@ -100,18 +166,11 @@ def plot_spectrum(audio_data, sample_rate):
     
     return fig
 
-def plot_spectrogram(audio_data, sample_rate):
+def plot_spectrogram(audio_data, sample_rate, spectrogram=None):
     """绘制频谱图（时频图）"""
-    # 计算短时傅里叶变换
-    frequencies, times, Sxx = signal.spectrogram(
-        audio_data, 
-        sample_rate, 
-        nperseg=1024,
-        noverlap=512
-    )
-    
-    # 转换为dB
-    Sxx_db = 10 * np.log10(Sxx + 1e-10)
+    if spectrogram is None:
+        spectrogram = compute_spectrogram(audio_data, sample_rate)
+    frequencies, times, Sxx_db = spectrogram
     
     fig = go.Figure(data=go.Heatmap(
         z=Sxx_db,
@@ -141,8 +200,13 @@ def create_audio_dashboard(audio_data, sample_rate):
         vertical_spacing=0.08  # 调整垂直间距
     )
     
-def create_audio_dashboard(audio_data, sample_rate):
+def create_audio_dashboard(audio_data, sample_rate, spectrum=None, spectrogram=None):
     """创建音频分析仪表板"""
+    if spectrum is None:
+        spectrum = compute_spectrum(audio_data, sample_rate)
+    if spectrogram is None:
+        spectrogram = compute_spectrogram(audio_data, sample_rate)
+    
     # 使用更简单的方法：分别创建时间轴相关的图表，然后组合
     from plotly.subplots import make_subplots
     
@@ -156,33 +220,27 @@ def create_audio_dashboard(audio_data, sample_rate):
         vertical_spacing=0.08
     )
     
-    # 计算时间轴
-    time = np.linspace(0, len(audio_data) / sample_rate, len(audio_data))
+    # 计算时间轴（抽取后的包络）
+    time, values = waveform_envelope(audio_data, sample_rate)
     
     # 波形图 (row=1, col=1)
     fig.add_trace(
-        go.Scatter(x=time, y=audio_data, mode='lines', name='波形', 
+        go.Scattergl(x=time, y=values, mode='lines', name='波形', 
                   line=dict(color='blue', width=1)),
         row=1, col=1
     )
     
     # 频谱图 (row=1, col=2)
-    fft = np.fft.fft(audio_data)
-    freqs = np.fft.fftfreq(len(audio_data), 1/sample_rate)
-    positive_freqs = freqs[:len(freqs)//2]
-    magnitude = np.abs(fft[:len(fft)//2])
+    freqs, magnitude_db = spectrum
     
     fig.add_trace(
-        go.Scatter(x=positive_freqs, y=20 * np.log10(magnitude + 1e-10), 
+        go.Scattergl(x=freqs, y=magnitude_db, 
                   mode='lines', name='频谱', line=dict(color='red', width=1)),
         row=1, col=2
     )
     
     # 时频谱图 (row=2, col=1) - 与波形图共享x轴
-    frequencies, times, Sxx = signal.spectrogram(
-        audio_data, sample_rate, nperseg=1024, noverlap=512
-    )
-    Sxx_db = 10 * np.log10(Sxx + 1e-10)
+    frequencies, times, Sxx_db = spectrogram
     
     fig.add_trace(
         go.Heatmap(z=Sxx_db, x=times, y=frequencies, 
@@ -191,15 +249,16 @@ def create_audio_dashboard(audio_data, sample_rate):
     )
     
     # 统计信息表格
+    max_val, min_val, mean, std, rms = compute_stats(audio_data)
     stats = {
         '统计项': ['最大值', '最小值', '均值', '标准差', '峰值因子', 'RMS'],
         '数值': [
-            f"{np.max(audio_data):.4f}",
-            f"{np.min(audio_data):.4f}",
-            f"{np.mean(audio_data):.4f}",
-            f"{np.std(audio_data):.4f}",
-            f"{np.max(np.abs(audio_data)) / (np.sqrt(np.mean(audio_data**2)) + 1e-10):.4f}",
-            f"{np.sqrt(np.mean(audio_data**2)):.4f}"
+            f"{max_val:.4f}",
+            f"{min_val:.4f}",
+            f"{mean:.4f}",
+            f"{std:.4f}",
+            f"{max(max_val, -min_val) / (rms + 1e-10):.4f}",
+            f"{rms:.4f}"
         ]
     }
     
@@ -230,14 +289,13 @@ def create_audio_dashboard(audio_data, sample_rate):
 
 def plot_3d_visualization(audio_data, sample_rate):
     """创建3D音频可视化"""
-    # 计算短时傅里叶变换
-    frequencies, times, Sxx = signal.spectrogram(
+    # 计算短时傅里叶变换（3D 图使用更短的窗口）
+    frequencies, times, Z = compute_spectrogram(
         audio_data, sample_rate, nperseg=512, noverlap=256
     )
     
     # 创建3D网格
     T, F = np.meshgrid(times, frequencies)
-    Z = 10 * np.log10(Sxx + 1e-10)
     
     fig = go.Figure(data=[go.Surface(
         x=T, y=F, z=Z,
@@ -272,7 +330,7 @@ def main():
     
     # 提取音频数据
     try:
-        audio_data = np.array(data.get('audio_data', []))
+        audio_data = np.asarray(data.get('audio_data', []), dtype=np.float64)
         sample_rate = data.get('sample_rate', 48000)
         
         if len(audio_data) == 0:
@@ -286,6 +344,10 @@ def main():
         print(f"数据格式错误: {e}")
         return -2
     
+    # 频谱和时频谱只计算一次，各图表共用
+    spectrum = compute_spectrum(audio_data, sample_rate)
+    spectrogram = compute_spectrogram(audio_data, sample_rate)
+    
     # 生成各种可视化图表
     print("\n正在生成可视化图表...")
     
@@ -296,17 +358,17 @@ def main():
     
     # 2. 频谱图
     print("2. 生成频谱图...")
-    spectrum_fig = plot_spectrum(audio_data, sample_rate)
+    spectrum_fig = plot_spectrum(audio_data, sample_rate, spectrum)
     spectrum_fig.show()
     
     # 3. 频谱图（时频分析）
     print("3. 生成频谱图...")
-    spectrogram_fig = plot_spectrogram(audio_data, sample_rate)
+    spectrogram_fig = plot_spectrogram(audio_data, sample_rate, spectrogram)
     spectrogram_fig.show()
     
     # 4. 仪表板
     print("4. 生成分析仪表板...")
-    dashboard_fig = create_audio_dashboard(audio_data, sample_rate)
+    dashboard_fig = create_audio_dashboard(audio_data, sample_rate, spectrum, spectrogram)
     dashboard_fig.show()
     
     # 5. 3D可视化
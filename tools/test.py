@@ -2,23 +2,82 @@
 """
 自动化测试脚本 - 参数扫描和性能测试
 
-该脚本通过修改 consts.rs 中的参数，自动运行 cargo build，
+该脚本通过修改 consts_sweep.rs 中的参数，自动运行 cargo build，
 然后启动发送和接收进程进行测试。
 """
 
+import argparse
+import asyncio
 import subprocess
 import os
 import sys
 import time
 import json
+import hashlib
+import mmap
+import multiprocessing
 import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
-from dataclasses import dataclass, asdict
-import matplotlib.pyplot as plt
-import numpy as np
+from typing import List, Tuple, Dict, Any, Optional, Set
+from dataclasses import dataclass, asdict, fields, replace
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson 可选，缺失时使用标准库 json
+    orjson = None
+
+
+# consts_sweep.rs 中参与扫描的参数
+PARAM_KEYS = (
+    "SAMPLES_PER_LEVEL",
+    "PREAMBLE_PATTERN_BYTES",
+    "DIFS_DURATION_MS",
+    "CW_MIN",
+    "CW_MAX",
+    "SLOT_TIME_MS",
+    "MAX_FRAME_DATA_SIZE",
+)
+
+
+# Rust 节点就绪后打印的标记行
+READY_MARKER = b"READY\n"
+
+# 设置该环境变量后，Rust 端才会在 stdout 输出 READY / TIMING 标记
+MARKERS_ENV = "TRACKMAKER_MARKERS"
+
+# Rust 端输出的计时标记：TIMING: phase=<name> elapsed_ns=<单调时钟纳秒>
+TIMING_PATTERN = re.compile(rb"TIMING: phase=(\w+) elapsed_ns=(\d+)")
+
+
+# 收发节点各自独占一个 CPU，cargo 构建使用剩余的 CPU（可用 CPU 少于 8 个时不绑定）
+NODE_CPU_SLOTS = {"rx1": 0, "rx2": 1, "tx1": 2, "tx2": 3}
+MIN_CPUS_FOR_PINNING = 8
+
+
+def plan_cpu_affinity() -> Tuple[Dict[str, int], Set[int]]:
+    """返回 ({节点名: CPU 编号}, 构建可用的 CPU 集合)，不支持或 CPU 不足时均为空"""
+    if not hasattr(os, "sched_setaffinity"):
+        return {}, set()
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < MIN_CPUS_FOR_PINNING:
+        return {}, set()
+    node_cpus = {name: cpus[slot] for name, slot in NODE_CPU_SLOTS.items()}
+    return node_cpus, set(cpus[len(NODE_CPU_SLOTS):])
+
+
+def parse_timing(log_path: Path) -> Dict[str, int]:
+    """读取日志中的 TIMING 标记，返回 {phase: elapsed_ns}（mmap 只读映射，不复制整个日志）"""
+    try:
+        with open(log_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return {m.group(1).decode(): int(m.group(2)) for m in TIMING_PATTERN.finditer(mm)}
+    except (OSError, ValueError):  # 文件不存在，或为空（无法映射）
+        return {}
+
 
 @dataclass
 class TestResult:
@@ -37,16 +96,43 @@ class TestResult:
     rx2_time: float
     max_time: float
     repeat: int
+    # 进程启动到退出的墙钟时间（上面的 *_time 优先取日志中 TIMING 标记给出的耗时）
+    tx1_wall_time: float = -1
+    tx2_wall_time: float = -1
+    rx1_wall_time: float = -1
+    rx2_wall_time: float = -1
+    # 各节点绑定的 CPU，如 "rx1:0,rx2:1,tx1:2,tx2:3"；未绑定时为空
+    cpu_affinity: str = ""
+    # 测得该结果时的源码及测试脚本指纹（ExperimentRunner.result_fingerprint），
+    # 源码或本脚本（命令行参数、计时方式等）改动后旧结果不再复用
+    result_hash: str = ""
+
+    def param_key(self) -> Tuple:
+        """(结果指纹, 参数取值...)，参数顺序与 PARAM_KEYS 一致"""
+        return (
+            self.result_hash,
+            self.samples_per_level,
+            self.preamble_bytes,
+            self.difs_duration_ms,
+            self.cw_min,
+            self.cw_max,
+            self.slot_time_ms,
+            self.max_frame_data_size,
+        )
 
 
 class ExperimentConfig:
     """实验配置"""
     def __init__(self):
         self.repo_path = Path(__file__).parent.parent
-        self.consts_file = self.repo_path / "src" / "utils" / "consts.rs"
+        self.consts_file = self.repo_path / "src" / "utils" / "consts_sweep.rs"
         self.project_dir = self.repo_path
         self.log_dir = self.repo_path / "tmp" / "experiment_logs"
         self.log_dir.mkdir(parents=True, exist_ok=True)
+        # 按参数组合缓存的可执行文件副本，也避免后台编译覆盖正在测试的文件
+        self.bin_dir = self.repo_path / "tmp" / "bins"
+        # 跨配置、跨运行复用的 cargo 构建目录
+        self.target_dir = self.repo_path / "tmp" / "target-cache"
         
     def get_parameter_combinations(self) -> List[Dict[str, Any]]:
         """
@@ -148,11 +234,15 @@ class ExperimentConfig:
 
 
 class ConstModifier:
-    """修改 consts.rs 的工具类"""
+    """修改 consts_sweep.rs 的工具类"""
     
     def __init__(self, consts_file: Path):
         self.consts_file = consts_file
         self.original_content = None
+        # 匹配 pub const PARAM_NAME: ... = VALUE; 一次替换所有参数
+        self._pattern = re.compile(
+            rf"(pub const ({'|'.join(PARAM_KEYS)}): \w+\s*=\s*)\d+"
+        )
         
     def read_original(self):
         """读取原始文件内容"""
@@ -164,57 +254,93 @@ class ConstModifier:
             self.consts_file.write_text(self.original_content)
             
     def update_params(self, params: Dict[str, Any]):
-        """更新 consts.rs 中的参数"""
+        """更新 consts_sweep.rs 中的参数"""
         content = self.consts_file.read_text()
         
-        # 要更新的参数映射
-        updates = {
-            "SAMPLES_PER_LEVEL": params.get("SAMPLES_PER_LEVEL"),
-            "PREAMBLE_PATTERN_BYTES": params.get("PREAMBLE_PATTERN_BYTES"),
-            "DIFS_DURATION_MS": params.get("DIFS_DURATION_MS"),
-            "CW_MIN": params.get("CW_MIN"),
-            "CW_MAX": params.get("CW_MAX"),
-            "SLOT_TIME_MS": params.get("SLOT_TIME_MS"),
-            "MAX_FRAME_DATA_SIZE": params.get("MAX_FRAME_DATA_SIZE"),
-        }
-        
-        for param_name, param_value in updates.items():
-            if param_value is not None:
-                # 匹配 pub const PARAM_NAME: ... = VALUE;
-                pattern = rf"(pub const {param_name}: \w+\s*=\s*)\d+"
-                replacement = rf"\g<1>{param_value}"
-                content = re.sub(pattern, replacement, content)
+        def _substitute(match: re.Match) -> str:
+            value = params.get(match.group(2))
+            return match.group(0) if value is None else f"{match.group(1)}{value}"
         
-        self.consts_file.write_text(content)
+        self.consts_file.write_text(self._pattern.sub(_substitute, content))
 
 
 class ProcessManager:
     """管理子进程"""
     
-    def __init__(self, project_dir: Path):
+    def __init__(self, project_dir: Path, cpu_affinity: Optional[Dict[str, int]] = None):
         self.project_dir = project_dir
+        # 日志目录和子进程工作目录只计算一次，启动进程时直接复用
+        self.tmp_dir = project_dir / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._project_dir_str = str(project_dir)
+        self._env = {**os.environ, MARKERS_ENV: "1"}
+        # 进程名 -> 绑定的 CPU，未列出的进程不绑定
+        self.cpu_affinity = cpu_affinity or {}
         self.processes = {}
         self.start_times = {}
         self.end_times = {}
+        self.log_paths = {}
+        # Linux 下把 pidfd 注册到事件循环等待进程退出，其它平台退回线程中阻塞等待
+        self.pidfds = {}
+        # stop_watching 之后退出的进程（被 terminate_all 终止）不记录结束时间
+        self._watching = True
+        self._watch_lock = threading.Lock()
         
     def start_process(self, name: str, cmd: List[str], output_file: str) -> subprocess.Popen:
         """启动一个进程"""
-        output_path = self.project_dir / "tmp" / output_file
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path = self.tmp_dir / output_file
         
+        # 不使用 preexec_fn / start_new_session，让 subprocess 在 Linux 上走 vfork 快速路径
+        # （设置了 cwd，因此不会走 posix_spawn）；Python 打开的 fd 默认不可继承，
+        # close_fds=False 可以跳过子进程中逐个关闭 fd 的循环
         with open(output_path, 'w') as f:
             proc = subprocess.Popen(
                 cmd,
                 stdout=f,
                 stderr=subprocess.STDOUT,
-                cwd=self.project_dir,
+                cwd=self._project_dir_str,
+                env=self._env,
+                close_fds=False,
             )
         
+        if name in self.cpu_affinity:
+            try:
+                os.sched_setaffinity(proc.pid, {self.cpu_affinity[name]})
+            except OSError as e:
+                print(f"  ⚠ Failed to pin {name} to CPU {self.cpu_affinity[name]}: {e}")
+        
         self.processes[name] = proc
         self.start_times[name] = time.time()
+        self.log_paths[name] = output_path
+        if hasattr(os, "pidfd_open"):
+            try:
+                self.pidfds[name] = os.pidfd_open(proc.pid)
+            except OSError:
+                pass
         print(f"  ✓ Started {name} (PID: {proc.pid})")
         return proc
         
+    def start_process_and_wait_ready(
+        self, name: str, cmd: List[str], output_file: str, ready_timeout: float = 5.0
+    ) -> bool:
+        """启动进程并跟踪其日志，直到出现 READY 行（节点已就绪）才返回"""
+        proc = self.start_process(name, cmd, output_file)
+        deadline = time.time() + ready_timeout
+        buf = b""
+        with open(self.log_paths[name], 'rb') as f:
+            while True:
+                buf += f.read()
+                if READY_MARKER in buf:
+                    return True
+                buf = buf[-len(READY_MARKER):]  # 保留末尾，防止标记被分两次读到
+                if proc.poll() is not None:
+                    print(f"  ✗ {name} exited before becoming ready")
+                    return False
+                if time.time() >= deadline:
+                    print(f"  ⚠️  {name} not ready after {ready_timeout}s, continuing")
+                    return False
+                time.sleep(0.01)
+        
     def wait_for_process(self, name: str, timeout: float = None) -> bool:
         """等待指定进程完成"""
         if name not in self.processes:
@@ -227,12 +353,52 @@ class ProcessManager:
         except subprocess.TimeoutExpired:
             return False
             
+    def exit_future(self, loop: asyncio.AbstractEventLoop, name: str) -> asyncio.Future:
+        """返回进程退出时完成的 future（结果为进程名），退出时间在回调中立即记录"""
+        proc = self.processes[name]
+        pidfd = self.pidfds.get(name)
+        if pidfd is None:
+            def wait() -> str:
+                proc.wait()
+                now = time.time()
+                with self._watch_lock:
+                    if self._watching:
+                        self.end_times[name] = now
+                return name
+            return loop.run_in_executor(None, wait)
+        
+        future = loop.create_future()
+        
+        def on_exit():
+            self.end_times[name] = time.time()
+            loop.remove_reader(pidfd)
+            os.close(self.pidfds.pop(name))
+            proc.poll()  # 回收子进程
+            if not future.done():
+                future.set_result(name)
+        
+        loop.add_reader(pidfd, on_exit)
+        return future
+        
+    def stop_watching(self, loop: asyncio.AbstractEventLoop):
+        """停止记录退出时间，并从事件循环中移除仍在等待的 pidfd（之后由 terminate_all 关闭）"""
+        with self._watch_lock:
+            self._watching = False
+        for pidfd in self.pidfds.values():
+            loop.remove_reader(pidfd)
+            
     def get_duration(self, name: str) -> float:
         """获取进程运行时间"""
         if name in self.start_times and name in self.end_times:
             return self.end_times[name] - self.start_times[name]
         return -1
         
+    def get_phase_duration(self, name: str, phase: str) -> float:
+        """返回日志中 <phase> 的 TIMING 标记给出的耗时（秒），缺少标记时返回 -1"""
+        marks = parse_timing(self.log_paths[name]) if name in self.log_paths else {}
+        elapsed = marks.get(phase)
+        return -1 if elapsed is None else elapsed / 1e9
+        
     def terminate_all(self):
         """终止所有进程"""
         for name, proc in self.processes.items():
@@ -243,6 +409,9 @@ class ProcessManager:
                     proc.wait(timeout=2)
                 except subprocess.TimeoutExpired:
                     proc.kill()
+        for pidfd in self.pidfds.values():
+            os.close(pidfd)
+        self.pidfds.clear()
                     
     def clear(self):
         """清空进程列表"""
@@ -254,26 +423,159 @@ class ProcessManager:
 class ExperimentRunner:
     """实验运行器"""
     
-    def __init__(self, config: ExperimentConfig):
+    def __init__(self, config: ExperimentConfig, use_cache: bool = True):
         self.config = config
+        self.use_cache = use_cache
         self.modifier = ConstModifier(config.consts_file)
         self.results: List[TestResult] = []
+        self.node_cpus, self.build_cpus = plan_cpu_affinity()
+        self.build_env = self.make_build_env()
+        self.cargo_binary = self.locate_binary()
+        self.source_hash = self.source_fingerprint()
+        self.result_hash = self.result_fingerprint()
+        # 常驻的绘图进程，图表渲染不阻塞实验主流程。绘图进程在首次提交时才创建，
+        # 此时构建线程已在运行，直接 fork 多线程进程可能死锁，因此用 forkserver 启动
+        self._plot_pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("forkserver")
+        )
+        self._prior = self.load_prior_results() if use_cache else {}
+        # 每得到一个结果就追加一行 NDJSON，中途中断也不会丢失已完成的测试；
+        # 日志文件在第一个结果写入时才创建，全部复用时不会留下空日志
+        self._journal_file = self.config.log_dir / f"journal_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+        self._journal = None
+        
+    def load_prior_results(self) -> Dict[Tuple, List[TestResult]]:
+        """读取 log_dir 中之前的 NDJSON 日志，按 (结果指纹, 参数取值) 分组
+
+        只保留与当前结果指纹相同的结果；没有指纹的旧记录一律跳过。
+        """
+        known = {f.name for f in fields(TestResult)}
+        prior: Dict[Tuple, List[TestResult]] = {}
+        for journal in sorted(self.config.log_dir.glob("journal_*.ndjson")):
+            with open(journal, 'rb') as f:
+                for line in f:
+                    try:
+                        d = orjson.loads(line) if orjson is not None else json.loads(line)
+                        result = TestResult(**{k: v for k, v in d.items() if k in known})
+                    except (ValueError, TypeError):  # 中断时写了一半的行，或旧格式
+                        continue
+                    if result.result_hash != self.result_hash:
+                        continue
+                    prior.setdefault(result.param_key(), []).append(result)
+        return prior
+        
+    def make_build_env(self) -> Dict[str, str]:
+        """构建用的环境变量：固定 target 目录、开启增量编译，有 sccache 时使用它缓存依赖"""
+        env = {
+            **os.environ,
+            "CARGO_TARGET_DIR": str(self.config.target_dir),
+            "CARGO_PROFILE_RELEASE_INCREMENTAL": "true",
+        }
+        if "RUSTC_WRAPPER" not in env and shutil.which("sccache"):
+            env["RUSTC_WRAPPER"] = "sccache"
+        if self.build_cpus:
+            env.setdefault("CARGO_BUILD_JOBS", str(len(self.build_cpus)))
+        return env
+        
+    def locate_binary(self) -> Path:
+        """通过 cargo metadata 找到 release 可执行文件路径"""
+        target_dir = self.config.target_dir
+        bin_name = "trackmaker-rs"
+        try:
+            result = subprocess.run(
+                ["cargo", "metadata", "--format-version", "1", "--no-deps"],
+                cwd=self.config.project_dir,
+                env=self.build_env,
+                capture_output=True,
+                check=True,
+                timeout=30,
+            )
+            metadata = json.loads(result.stdout)
+            target_dir = Path(metadata["target_directory"])
+            package = metadata["packages"][0]
+            bin_name = package.get("default_run") or next(
+                t["name"] for t in package["targets"] if "bin" in t["kind"]
+            )
+        except (subprocess.SubprocessError, OSError, KeyError, StopIteration, ValueError) as e:
+            print(f"  ⚠ cargo metadata failed ({e}), using default binary path")
+        return target_dir / "release" / bin_name
+        
+    def source_fingerprint(self) -> str:
+        """除扫描参数外的源码指纹，源码改动后缓存的可执行文件自然失效"""
+        root = self.config.project_dir
+        digest = hashlib.sha1()
+        for path in sorted(root.glob("src/**/*.rs")) + [root / "Cargo.toml", root / "Cargo.lock"]:
+            if path == self.config.consts_file or not path.exists():
+                continue
+            digest.update(str(path.relative_to(root)).encode())
+            digest.update(path.read_bytes())
+        return digest.hexdigest()
+        
+    def result_fingerprint(self) -> str:
+        """复用测试结果时使用的指纹：源码指纹 + 本脚本内容
+
+        本脚本决定了节点的命令行参数（如 rx 的 -d）和计时方式，修改后旧结果同样失效；
+        可执行文件缓存只依赖源码指纹，不受影响。
+        """
+        digest = hashlib.sha1(self.source_hash.encode())
+        digest.update(Path(__file__).read_bytes())
+        return digest.hexdigest()
         
-    def build(self) -> bool:
-        """构建项目"""
-        print("  Building project...")
-        result = subprocess.run(
-            ["cargo", "build"],
+    def build(self, param_config: Dict[str, Any]) -> Optional[Path]:
+        """更新参数并构建项目（release），返回该参数组合对应的可执行文件副本
+
+        可执行文件按 (源码指纹, 参数值) 缓存，参数相同的配置或重复运行脚本时直接复用。
+        """
+        config_name = param_config["name"]
+        key = tuple(param_config.get(k) for k in PARAM_KEYS)
+        cache_name = hashlib.sha1(f"{self.source_hash}:{key}".encode()).hexdigest()[:16]
+        binary = self.config.bin_dir / cache_name / self.cargo_binary.name
+        if binary.exists():
+            print(f"  [build] {config_name}: using cached binary {binary}")
+            return binary
+        
+        print(f"  [build] {config_name}: updating consts_sweep.rs and building...")
+        self.modifier.update_params(param_config)
+        proc = subprocess.Popen(
+            ["cargo", "build", "--release"],
             cwd=self.config.project_dir,
-            capture_output=True,
-            timeout=120,
+            env=self.build_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
         )
-        return result.returncode == 0
+        # 构建限制在收发节点之外的 CPU 上，不干扰正在进行的测量；rustc 子进程继承该设置
+        if self.build_cpus:
+            try:
+                os.sched_setaffinity(proc.pid, self.build_cpus)
+            except OSError:
+                pass
+        try:
+            proc.communicate(timeout=600)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        if proc.returncode != 0:
+            return None
+        
+        # 复制一份，下一个配置的编译不会覆盖正在运行的可执行文件
+        # 先写到同目录下的临时文件再原子替换，中断或磁盘写满时不会留下被当作缓存命中的残缺文件
+        binary.parent.mkdir(parents=True, exist_ok=True)
+        partial = binary.with_name(binary.name + ".part")
+        try:
+            shutil.copy2(self.cargo_binary, partial)
+            os.replace(partial, binary)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        print(f"  [build] {config_name}: done")
+        return binary
         
     def run_single_test(
         self,
         param_config: Dict[str, Any],
         repeat_idx: int,
+        binary_path: Path,
     ) -> TestResult:
         """运行单个测试"""
         config_name = param_config["name"]
@@ -287,86 +589,40 @@ class ExperimentRunner:
         print(f"    - SLOT_TIME_MS: {param_config['SLOT_TIME_MS']}")
         print(f"    - MAX_FRAME_DATA_SIZE: {param_config['MAX_FRAME_DATA_SIZE']}")
         
-        # 1. 更新参数
-        print("  Updating consts.rs...")
-        self.modifier.update_params(param_config)
-        
-        # 2. 编译
-        print("  Building...")
-        if not self.build():
-            print("  ❌ Build failed!")
-            return None
-            
-        # 3. 清理之前的输出文件
+        # 1. 清理之前的输出文件
         for f in ["tx1.log", "tx2.log", "rx1.log", "rx2.log"]:
             log_file = self.config.project_dir / "tmp" / f
             if log_file.exists():
                 log_file.unlink()
         
-        # 4. 启动进程
+        # 2. 启动进程
         print("  Starting processes...")
-        pm = ProcessManager(self.config.project_dir)
-        
-        # 启动两个发送端和两个接收端
-        pm.start_process("rx2", ["cargo", "run", "--release", "--", "rx", "-l", "2", "-r", "1", "-d", "40"], "rx2.log")
-        time.sleep(1)
-        pm.start_process("rx1", ["cargo", "run", "--release", "--", "rx", "-l", "1", "-r", "2", "-d", "40"], "rx1.log")
-        time.sleep(1)
-        pm.start_process("tx2", ["cargo", "run", "--release", "--", "tx", "-l", "2", "-r", "1"], "tx2.log")
-        time.sleep(0.5)
-        pm.start_process("tx1", ["cargo", "run", "--release", "--", "tx", "-l", "1", "-r", "2"], "tx1.log")
-        
-        # 5. 等待进程完成
-        print("  Waiting for processes to complete...")
-        tx_processes = {"tx1", "tx2"}
-        rx_processes = {"rx1", "rx2"}
-        tx_completed = set()
-        rx_completed = set()
+        pm = ProcessManager(self.config.project_dir, self.node_cpus)
         
-        # 设置总超时时间（应该足够完成测试）
-        total_timeout = 120
-        start_wait = time.time()
-        
-        while time.time() - start_wait < total_timeout:
-            # 检查 TX 进程
-            for tx_name in tx_processes - tx_completed:
-                if pm.processes[tx_name].poll() is not None:
-                    pm.end_times[tx_name] = time.time()
-                    tx_completed.add(tx_name)
-                    print(f"    ✓ {tx_name} completed ({pm.get_duration(tx_name):.2f}s)")
-            
-            # 检查 RX 进程
-            for rx_name in rx_processes - rx_completed:
-                if pm.processes[rx_name].poll() is not None:
-                    pm.end_times[rx_name] = time.time()
-                    rx_completed.add(rx_name)
-                    print(f"    ✓ {rx_name} completed ({pm.get_duration(rx_name):.2f}s)")
-            
-            # 当所有 TX 和所有 RX 都完成时，退出等待
-            if tx_completed == tx_processes or rx_completed == rx_processes:
-                print("  Transmission completed / timeout!")
-                break
-                
-            time.sleep(0.5)
+        # 启动两个发送端和两个接收端（直接运行已编译的可执行文件，不经过 cargo run）
+        binary = str(binary_path)
+        # 每个进程打印 READY 后再启动下一个，保证接收端先于发送端就绪
+        pm.start_process_and_wait_ready("rx2", [binary, "rx", "-l", "2", "-r", "1", "-d", "40"], "rx2.log")
+        pm.start_process_and_wait_ready("rx1", [binary, "rx", "-l", "1", "-r", "2", "-d", "40"], "rx1.log")
+        pm.start_process_and_wait_ready("tx2", [binary, "tx", "-l", "2", "-r", "1"], "tx2.log")
+        pm.start_process("tx1", [binary, "tx", "-l", "1", "-r", "2"], "tx1.log")
         
-        # 6. 终止所有未完成的进程
-        if tx_completed != tx_processes or rx_completed != rx_processes:
-            print("  Terminating remaining processes...")
-            pm.terminate_all()
-        
-        # 7. 收集结果
-        tx1_time = pm.get_duration("tx1")
-        tx2_time = pm.get_duration("tx2")
-        rx1_time = pm.get_duration("rx1")
-        rx2_time = pm.get_duration("rx2")
+        # 3. 等待进程完成，4. 终止所有未完成的进程
+        print("  Waiting for processes to complete...")
+        # 设置总超时时间（应该足够完成测试）
+        asyncio.run(self.wait_for_completion(pm, total_timeout=120))
         
+        # 5. 收集结果：优先使用日志中的 TIMING 标记（不含进程启动等开销），缺失时退回墙钟时间
+        wall_times = {}
+        times = {}
         print(f"  Results:")
-        print(f"    - TX1 time: {tx1_time:.2f}s")
-        print(f"    - TX2 time: {tx2_time:.2f}s")
-        print(f"    - RX1 time: {rx1_time:.2f}s")
-        print(f"    - RX2 time: {rx2_time:.2f}s")
+        for name, phase in [("tx1", "transmit"), ("tx2", "transmit"), ("rx1", "receive"), ("rx2", "receive")]:
+            wall_times[name] = pm.get_duration(name)
+            phase_time = pm.get_phase_duration(name, phase)
+            times[name] = phase_time if phase_time >= 0 else wall_times[name]
+            print(f"    - {name.upper()} time: {times[name]:.2f}s (wall: {wall_times[name]:.2f}s)")
         
-        max_time = max(tx1_time, tx2_time, rx1_time, rx2_time)
+        max_time = max(times.values())
         
         result = TestResult(
             config_name=config_name,
@@ -377,16 +633,57 @@ class ExperimentRunner:
             cw_max=param_config["CW_MAX"],
             slot_time_ms=param_config["SLOT_TIME_MS"],
             max_frame_data_size=param_config["MAX_FRAME_DATA_SIZE"],
-            tx1_time=tx1_time,
-            tx2_time=tx2_time,
-            rx1_time=rx1_time,
-            rx2_time=rx2_time,
+            tx1_time=times["tx1"],
+            tx2_time=times["tx2"],
+            rx1_time=times["rx1"],
+            rx2_time=times["rx2"],
             max_time=max_time,
             repeat=repeat_idx + 1,
+            tx1_wall_time=wall_times["tx1"],
+            tx2_wall_time=wall_times["tx2"],
+            rx1_wall_time=wall_times["rx1"],
+            rx2_wall_time=wall_times["rx2"],
+            cpu_affinity=",".join(f"{name}:{cpu}" for name, cpu in self.node_cpus.items()),
+            result_hash=self.result_hash,
         )
         
         return result
         
+    async def wait_for_completion(self, pm: ProcessManager, total_timeout: float):
+        """等待所有 TX 或所有 RX 退出（或超时），然后终止剩余进程"""
+        loop = asyncio.get_running_loop()
+        tx_processes = {"tx1", "tx2"}
+        rx_processes = {"rx1", "rx2"}
+        tx_completed = set()
+        rx_completed = set()
+        
+        pending = {pm.exit_future(loop, name) for name in tx_processes | rx_processes}
+        deadline = loop.time() + total_timeout
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(0, deadline - loop.time()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            
+            for future in done:
+                name = future.result()
+                (tx_completed if name in tx_processes else rx_completed).add(name)
+                print(f"    ✓ {name} completed ({pm.get_duration(name):.2f}s)")
+            
+            # 当所有 TX 和所有 RX 都完成时，退出等待
+            if tx_completed == tx_processes or rx_completed == rx_processes:
+                print("  Transmission completed / timeout!")
+                break
+        
+        # 在协程内终止剩余进程，等待线程随之返回，事件循环关闭时不会阻塞
+        pm.stop_watching(loop)
+        if tx_completed != tx_processes or rx_completed != rx_processes:
+            print("  Terminating remaining processes...")
+            pm.terminate_all()
+        
     def run_all_experiments(self):
         """运行所有实验"""
         print("=" * 80)
@@ -398,17 +695,46 @@ class ExperimentRunner:
         
         param_combinations = self.config.get_parameter_combinations()
         
+        # 之前的运行中（源码和本脚本均相同）已有 4 次结果的参数组合直接复用，不再编译和测试
+        to_run = []
+        for param_config in param_combinations:
+            key = (self.result_hash, *(param_config.get(k) for k in PARAM_KEYS))
+            cached = self._prior.get(key, [])
+            if len(cached) >= 4:
+                print(f"  [cache] {param_config['name']}: reusing {len(cached[-4:])} previous results")
+                self.results.extend(replace(r, config_name=param_config["name"]) for r in cached[-4:])
+            else:
+                to_run.append(param_config)
+        param_combinations = to_run
+        
+        # 编译在后台线程中进行：测试配置 N 的同时只编译配置 N+1，最多一个构建在进行，
+        # 避免连续编译后续所有配置与收发节点争抢 CPU。
+        # 测试本身占用音频设备，仍然在主线程中串行执行。
+        builder = ThreadPoolExecutor(max_workers=1)
+        next_build = builder.submit(self.build, param_combinations[0]) if param_combinations else None
+        
         try:
             # 对每个参数组合进行4次重复测试
-            for param_config in param_combinations:
+            for idx, param_config in enumerate(param_combinations):
+                binary_path = next_build.result()
+                if idx + 1 < len(param_combinations):
+                    next_build = builder.submit(self.build, param_combinations[idx + 1])
+                if binary_path is None:
+                    print(f"\n❌ Build failed for {param_config['name']}!")
+                    continue
+                
                 for repeat_idx in range(4):
-                    result = self.run_single_test(param_config, repeat_idx)
+                    result = self.run_single_test(param_config, repeat_idx, binary_path)
                     if result:
-                        self.results.append(result)
+                        self.record_result(result)
                     time.sleep(2)  # 测试之间的间隔
+                
+                # 每完成一个配置，后台刷新一次阶段性图表
+                self.plot_results(self.config.log_dir / "results_partial.png", wait=False)
         finally:
+            builder.shutdown(wait=True, cancel_futures=True)
             # 恢复原始文件
-            print("\n  Restoring consts.rs...")
+            print("\n  Restoring consts_sweep.rs...")
             self.modifier.restore()
         
         # 保存结果
@@ -421,6 +747,24 @@ class ExperimentRunner:
         print("✅ All experiments completed!")
         print("=" * 80)
         
+    def record_result(self, result: TestResult):
+        """保存一个测试结果，并立即写入 NDJSON 日志"""
+        self.results.append(result)
+        if orjson is not None:
+            line = orjson.dumps(asdict(result))
+        else:
+            line = json.dumps(asdict(result)).encode()
+        if self._journal is None:
+            self._journal = open(self._journal_file, 'ab', buffering=0)
+        self._journal.write(line + b"\n")
+        
+    def close(self):
+        """关闭绘图进程和结果日志（等待尚未完成的绘图）"""
+        self._plot_pool.shutdown()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        
     def save_results(self):
         """保存结果到 JSON 文件"""
         results_file = self.config.log_dir / f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -430,152 +774,190 @@ class ExperimentRunner:
             "results": [asdict(r) for r in self.results],
         }
         
-        with open(results_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        if orjson is not None:
+            with open(results_file, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(results_file, 'w') as f:
+                json.dump(data, f, indent=2)
         
         print(f"\n📝 Results saved to: {results_file}")
         
-    def plot_results(self):
-        """绘制结果图表"""
+    def prepare_plot_data(self) -> Optional[Dict[str, Any]]:
+        """汇总绘图所需的数据，只包含可跨进程传递的简单数组"""
         if not self.results:
+            return None
+        
+        import pandas as pd  # 仅绘图时需要，延迟导入以加快脚本启动
+        
+        # 按 config_name 分组，一次算出各子图需要的统计量（保持配置的运行顺序）
+        df = pd.DataFrame([asdict(r) for r in self.results])
+        grouped = df.groupby("config_name", sort=False)
+        agg = grouped.agg(
+            max_mean=("max_time", "mean"),
+            samples_per_level=("samples_per_level", "first"),
+            cw_min=("cw_min", "first"),
+            max_frame_data_size=("max_frame_data_size", "first"),
+            difs_duration_ms=("difs_duration_ms", "first"),
+        )
+        agg["max_std"] = grouped["max_time"].std(ddof=0)
+        
+        data = {column: agg[column].to_numpy() for column in agg.columns}
+        data["config_names"] = list(agg.index)
+        # 每次运行一行的列式数据：所属配置的序号和最大运行时间
+        data["run_config_idx"] = grouped.ngroup().to_numpy()
+        data["run_max_time"] = df["max_time"].to_numpy()
+        return data
+        
+    def plot_results(self, plot_file: Optional[Path] = None, wait: bool = True):
+        """绘制结果图表
+
+        渲染交给常驻的绘图进程；设置环境变量 SHOW_PLOT=1 时在当前进程绘制并显示窗口。
+        """
+        data = self.prepare_plot_data()
+        if data is None:
             print("No results to plot")
             return
         
-        # 按 config_name 分组
-        grouped = {}
-        for result in self.results:
-            if result.config_name not in grouped:
-                grouped[result.config_name] = []
-            grouped[result.config_name].append(result)
-        
-        config_names = list(grouped.keys())
-        max_times = []
-        max_times_std = []
-        
-        for config_name in config_names:
-            times = [r.max_time for r in grouped[config_name]]
-            max_times.append(np.mean(times))
-            max_times_std.append(np.std(times))
-        
-        # 绘制柱状图
-        fig, axes = plt.subplots(2, 3, figsize=(18, 10))
-        fig.suptitle('Performance Analysis by Configuration', fontsize=16, fontweight='bold')
-        
-        # 1. 最大运行时间对比
-        ax1 = axes[0, 0]
-        x_pos = np.arange(len(config_names))
-        ax1.bar(x_pos, max_times, yerr=max_times_std, capsize=5, alpha=0.7, color='steelblue')
-        ax1.set_xlabel('Configuration')
-        ax1.set_ylabel('Time (seconds)')
-        ax1.set_title('Max Process Completion Time (Mean ± Std)')
-        ax1.set_xticks(x_pos)
-        ax1.set_xticklabels(config_names, rotation=45, ha='right')
-        ax1.grid(axis='y', alpha=0.3)
-        
-        # 2. 详细时间对比
-        ax2 = axes[0, 1]
-        width = 0.2
-        for i, config_name in enumerate(config_names):
-            times = [r.max_time for r in grouped[config_name]]
-            x_offset = x_pos[i] + (width * (len(config_names) - 1) / 2)
-            ax2.scatter([i] * len(times), times, alpha=0.6, s=50, label=config_name if i == 0 else "")
-        
-        ax2.set_xlabel('Configuration')
-        ax2.set_ylabel('Time (seconds)')
-        ax2.set_title('Individual Run Times by Configuration')
-        ax2.set_xticks(x_pos)
-        ax2.set_xticklabels(config_names, rotation=45, ha='right')
-        ax2.grid(alpha=0.3)
-        
-        # 3. 参数影响分析：SAMPLES_PER_LEVEL vs 运行时间
-        ax3 = axes[0, 2]
-        samples_levels = []
-        times_by_sample = []
-        for config_name in config_names:
-            samples = grouped[config_name][0].samples_per_level
-            times = [r.max_time for r in grouped[config_name]]
-            samples_levels.append(samples)
-            times_by_sample.append(np.mean(times))
-        
-        ax3.plot(samples_levels, times_by_sample, marker='o', linewidth=2, markersize=8, color='green')
-        ax3.set_xlabel('SAMPLES_PER_LEVEL')
-        ax3.set_ylabel('Average Max Time (seconds)')
-        ax3.set_title('Impact of SAMPLES_PER_LEVEL')
-        ax3.grid(alpha=0.3)
-        
-        # 4. 参数影响分析：CW_MIN vs 运行时间
-        ax4 = axes[1, 0]
-        cw_mins = []
-        times_by_cw = []
-        for config_name in config_names:
-            cw_min = grouped[config_name][0].cw_min
-            times = [r.max_time for r in grouped[config_name]]
-            cw_mins.append(cw_min)
-            times_by_cw.append(np.mean(times))
-        
-        ax4.plot(cw_mins, times_by_cw, marker='s', linewidth=2, markersize=8, color='orange')
-        ax4.set_xlabel('CW_MIN')
-        ax4.set_ylabel('Average Max Time (seconds)')
-        ax4.set_title('Impact of CW_MIN (Backoff Window)')
-        ax4.grid(alpha=0.3)
-        
-        # 5. 参数影响分析：MAX_FRAME_DATA_SIZE vs 运行时间
-        ax5 = axes[1, 1]
-        frame_sizes = []
-        times_by_frame = []
-        for config_name in config_names:
-            frame_size = grouped[config_name][0].max_frame_data_size
-            times = [r.max_time for r in grouped[config_name]]
-            frame_sizes.append(frame_size)
-            times_by_frame.append(np.mean(times))
-        
-        ax5.plot(frame_sizes, times_by_frame, marker='^', linewidth=2, markersize=8, color='red')
-        ax5.set_xlabel('MAX_FRAME_DATA_SIZE (bytes)')
-        ax5.set_ylabel('Average Max Time (seconds)')
-        ax5.set_title('Impact of MAX_FRAME_DATA_SIZE')
-        ax5.grid(alpha=0.3)
-        
-        # 6. 参数影响分析：DIFS_DURATION_MS vs 运行时间
-        ax6 = axes[1, 2]
-        difs_durations = []
-        times_by_difs = []
-        for config_name in config_names:
-            difs_duration = grouped[config_name][0].difs_duration_ms
-            times = [r.max_time for r in grouped[config_name]]
-            difs_durations.append(difs_duration)
-            times_by_difs.append(np.mean(times))
-        
-        ax6.plot(difs_durations, times_by_difs, marker='D', linewidth=2, markersize=8, color='purple')
-        ax6.set_xlabel('DIFS_DURATION_MS (milliseconds)')
-        ax6.set_ylabel('Average Max Time (seconds)')
-        ax6.set_title('Impact of DIFS_DURATION_MS')
-        ax6.grid(alpha=0.3)
-        
-        plt.tight_layout()
-        
-        # 保存图表
-        plot_file = self.config.log_dir / f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        plt.savefig(plot_file, dpi=150, bbox_inches='tight')
-        print(f"📊 Plot saved to: {plot_file}")
-        
-        # 显示图表
+        if plot_file is None:
+            plot_file = self.config.log_dir / f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        
+        if os.environ.get("SHOW_PLOT"):
+            _render_plot(data, plot_file, show=True)
+            return
+        
+        try:
+            future = self._plot_pool.submit(_render_plot, data, plot_file)
+            if wait:
+                future.result()
+        except BrokenProcessPool:
+            # 绘图进程已退出（例如随 Ctrl+C 一起收到 SIGINT，可能发生在提交之后），退回当前进程绘制
+            _render_plot(data, plot_file)
+
+
+def _render_plot(data: Dict[str, Any], plot_file: Path, show: bool = False):
+    """根据 ExperimentRunner.prepare_plot_data 的结果绘制并保存图表（在绘图进程中运行）"""
+    # 延迟导入绘图依赖；不显示窗口时使用 Agg 后端，避免加载 Tk/Qt
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+    
+    config_names = data["config_names"]
+    
+    # 绘制柱状图
+    fig, axes = plt.subplots(2, 3, figsize=(18, 10))
+    fig.suptitle('Performance Analysis by Configuration', fontsize=16, fontweight='bold')
+    
+    # 1. 最大运行时间对比
+    ax1 = axes[0, 0]
+    x_pos = np.arange(len(config_names))
+    ax1.bar(x_pos, data["max_mean"], yerr=data["max_std"], capsize=5, alpha=0.7, color='steelblue')
+    ax1.set_xlabel('Configuration')
+    ax1.set_ylabel('Time (seconds)')
+    ax1.set_title('Max Process Completion Time (Mean ± Std)')
+    ax1.set_xticks(x_pos)
+    ax1.set_xticklabels(config_names, rotation=45, ha='right')
+    ax1.grid(axis='y', alpha=0.3)
+    
+    # 2. 详细时间对比
+    ax2 = axes[0, 1]
+    # 一次绘制所有运行，按配置序号依次取默认色环（tab10）中的颜色
+    run_config_idx = data["run_config_idx"]
+    ax2.scatter(run_config_idx, data["run_max_time"], c=run_config_idx % 10,
+                cmap='tab10', vmin=0, vmax=10, alpha=0.6, s=50)
+    
+    ax2.set_xlabel('Configuration')
+    ax2.set_ylabel('Time (seconds)')
+    ax2.set_title('Individual Run Times by Configuration')
+    ax2.set_xticks(x_pos)
+    ax2.set_xticklabels(config_names, rotation=45, ha='right')
+    ax2.grid(alpha=0.3)
+    
+    # 3. 参数影响分析：SAMPLES_PER_LEVEL vs 运行时间
+    ax3 = axes[0, 2]
+    ax3.plot(data["samples_per_level"], data["max_mean"], marker='o', linewidth=2, markersize=8, color='green')
+    ax3.set_xlabel('SAMPLES_PER_LEVEL')
+    ax3.set_ylabel('Average Max Time (seconds)')
+    ax3.set_title('Impact of SAMPLES_PER_LEVEL')
+    ax3.grid(alpha=0.3)
+    
+    # 4. 参数影响分析：CW_MIN vs 运行时间
+    ax4 = axes[1, 0]
+    ax4.plot(data["cw_min"], data["max_mean"], marker='s', linewidth=2, markersize=8, color='orange')
+    ax4.set_xlabel('CW_MIN')
+    ax4.set_ylabel('Average Max Time (seconds)')
+    ax4.set_title('Impact of CW_MIN (Backoff Window)')
+    ax4.grid(alpha=0.3)
+    
+    # 5. 参数影响分析：MAX_FRAME_DATA_SIZE vs 运行时间
+    ax5 = axes[1, 1]
+    ax5.plot(data["max_frame_data_size"], data["max_mean"], marker='^', linewidth=2, markersize=8, color='red')
+    ax5.set_xlabel('MAX_FRAME_DATA_SIZE (bytes)')
+    ax5.set_ylabel('Average Max Time (seconds)')
+    ax5.set_title('Impact of MAX_FRAME_DATA_SIZE')
+    ax5.grid(alpha=0.3)
+    
+    # 6. 参数影响分析：DIFS_DURATION_MS vs 运行时间
+    ax6 = axes[1, 2]
+    ax6.plot(data["difs_duration_ms"], data["max_mean"], marker='D', linewidth=2, markersize=8, color='purple')
+    ax6.set_xlabel('DIFS_DURATION_MS (milliseconds)')
+    ax6.set_ylabel('Average Max Time (seconds)')
+    ax6.set_title('Impact of DIFS_DURATION_MS')
+    ax6.grid(alpha=0.3)
+    
+    # 固定边距代替 tight_layout / bbox_inches='tight'，保存时只需渲染一遍
+    fig.subplots_adjust(left=0.07, right=0.98, top=0.93, bottom=0.07, wspace=0.3, hspace=0.6)
+    
+    # 保存图表
+    if show:
+        fig.savefig(plot_file, dpi=150)  # 保留交互后端的画布，之后还要显示
+    else:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig.set_dpi(150)
+        FigureCanvasAgg(fig).print_png(str(plot_file))
+    print(f"📊 Plot saved to: {plot_file}")
+    
+    # 显示图表
+    if show:
         plt.show()
+    plt.close(fig)
 
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="参数扫描和性能测试")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="忽略之前日志中的结果，重新运行所有参数组合",
+    )
+    args = parser.parse_args()
+    
+    runner = None
     try:
         config = ExperimentConfig()
-        runner = ExperimentRunner(config)
+        runner = ExperimentRunner(config, use_cache=not args.no_cache)
         runner.run_all_experiments()
     except KeyboardInterrupt:
         print("\n❌ Experiment interrupted by user")
+        # 尽量保存已完成的部分结果
+        if runner is not None and runner.results:
+            try:
+                runner.save_results()
+                runner.plot_results()
+            except Exception as e:
+                print(f"  ⚠ Failed to save partial results: {e}")
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if runner is not None:
+            runner.close()
 
 
 if __name__ == "__main__":